@@ -1,12 +1,21 @@
 import re
 import csv
 import json
+import heapq
+import codecs
+import shutil
 import string
+import binascii
+import tempfile
 from collections import defaultdict
+from contextlib import closing
+from itertools import chain, groupby
 from pathlib import Path
 from email.parser import BytesParser
 from email.policy import default
 from email.utils import getaddresses
+from html import unescape
+from urllib.parse import unquote
 
 
 # ===============================
@@ -18,6 +27,24 @@ EMAIL_REGEX = re.compile(EMAIL_PATTERN)
 
 ENCODINGS = ['utf-8', 'utf-16', 'iso-8859-1']
 
+# Bump whenever extraction or .ahk/.json output changes for the same input;
+# cached results keyed on it (see service.py) are then regenerated.
+FORMAT_VERSION = 3
+
+# Explicit exclusion (preserved behavior)
+EXCLUDED_EMAILS = {"marc.turner@ukg.com"}
+
+# Spill-to-disk mode: inputs at least this large are deduplicated with an
+# external sort instead of an in-memory set.
+SPILL_THRESHOLD_BYTES = 256 * 1024 * 1024
+SPILL_MEMORY_BUDGET = 64 * 1024 * 1024
+READ_CHUNK_SIZE = 1024 * 1024
+
+# Streaming HTML: payload characters decoded per step, and the longest run
+# of tag-free text held back before it is scanned.
+HTML_CHUNK_SIZE = 64 * 1024
+HTML_MAX_PENDING_TEXT = 64 * 1024
+
 # Reserved shortcuts
 RESERVED_KEYS = {"Z", "R", "X"}
 AVAILABLE_KEYS = [k for k in string.ascii_uppercase if k not in RESERVED_KEYS]
@@ -27,6 +54,155 @@ AVAILABLE_KEYS = [k for k in string.ascii_uppercase if k not in RESERVED_KEYS]
 # Email extraction
 # ===============================
 
+_HTML_TAG = re.compile(
+    r'<[a-zA-Z/!?](?:[^>"\']|"[^"]*"|\'[^\']*\')*>'
+)
+_HTML_MAILTO = re.compile(
+    r'<[a-zA-Z][^>]*?\bhref\s*=\s*["\']?\s*mailto:([^"\'\s>]*)', re.IGNORECASE
+)
+_HTML_SKIP_START = re.compile(r'<!--|<(script|style)\b', re.IGNORECASE)
+_HTML_SKIP_END = {
+    None: re.compile(r'-->'),
+    "script": re.compile(r'</script', re.IGNORECASE),
+    "style": re.compile(r'</style', re.IGNORECASE),
+}
+
+
+class _HtmlEmailScanner:
+    """
+    Incremental HTML scanner: finds addresses in text nodes (entities
+    resolved) and mailto: hrefs, skipping other attributes, comments,
+    <script> and <style>.
+
+    Each feed() scans everything up to the end of the data except an
+    unfinished tag or the last word of trailing text, which are held for
+    the next feed; tags are stripped with one regex pass per region rather
+    than per-tag callbacks.
+    """
+    def __init__(self):
+        self.emails = set()
+        self._buffer = ""
+        self._skip_end = None  # end pattern of the comment/script/style being skipped
+
+    def _scan(self, text: str):
+        self.emails.update(e.lower() for e in EMAIL_REGEX.findall(text))
+
+    def _scan_markup(self, markup: str):
+        # "mailto:a%40b.com,c@d.com?subject=…" → address part only
+        hrefs = [m.group(1).split("?", 1)[0] for m in _HTML_MAILTO.finditer(markup)]
+        if hrefs:
+            self._scan(unquote(unescape(" ".join(hrefs))))
+        text = _HTML_TAG.sub(" ", markup)
+        if "&" in text:
+            text = unescape(text)
+        self._scan(text)
+
+    def feed(self, data: str, final=False):
+        buf = self._buffer + data
+        self._buffer = ""
+        pos = 0
+
+        while True:
+            if self._skip_end is not None:
+                end = self._skip_end.search(buf, pos)
+                if end is None:
+                    # Skipped content is dropped; keep only enough to catch
+                    # an end marker split across feeds
+                    if not final:
+                        self._buffer = buf[max(pos, len(buf) - len("</script") + 1):]
+                    return
+                # </script…> itself is stripped with the following region
+                pos = end.end() if end.group() == "-->" else end.start()
+                self._skip_end = None
+
+            m = _HTML_SKIP_START.search(buf, pos)
+            if m is None:
+                break
+            self._scan_markup(buf[pos:m.start()])
+            self._skip_end = _HTML_SKIP_END[m.group(1).lower() if m.group(1) else None]
+            pos = m.end()
+
+        rest = buf[pos:]
+        cut = len(rest)
+        if not final:
+            lt = rest.rfind("<")
+            tag = _HTML_TAG.match(rest, lt) if lt >= 0 else None
+            if lt >= 0 and tag is None and cut - lt <= HTML_MAX_PENDING_TEXT:
+                cut = lt  # unfinished tag
+            else:
+                # Trailing text may end mid-address or mid-entity; neither
+                # contains whitespace
+                start = tag.end() if tag else 0
+                ws = max(rest.rfind(c, start) for c in " \t\r\n")
+                cut = ws + 1 if ws >= 0 else start
+                if len(rest) - cut > HTML_MAX_PENDING_TEXT:
+                    cut = len(rest)
+
+        self._scan_markup(rest[:cut])
+        self._buffer = rest[cut:]
+
+    def close(self):
+        self.feed("", final=True)
+
+
+def _iter_html_part_text(part):
+    """
+    Yield a text/html part's body as decoded text, HTML_CHUNK_SIZE at a time.
+    base64 / quoted-printable are decoded chunk by chunk; every body then
+    runs through an incremental decoder for the part's charset.
+    """
+    charset = part.get_content_charset("us-ascii")
+    try:
+        decoder = codecs.getincrementaldecoder(charset)(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    cte = part.get("content-transfer-encoding", "").strip().lower()
+
+    if cte not in ("base64", "quoted-printable"):
+        # 7bit / 8bit: decode the original bytes ourselves rather than trust
+        # how email turned non-ASCII bytes into str
+        raw = part.get_payload(decode=True) or b""
+        for i in range(0, len(raw), HTML_CHUNK_SIZE):
+            yield decoder.decode(raw[i:i + HTML_CHUNK_SIZE])
+        yield decoder.decode(b"", final=True)
+        return
+
+    payload = part.get_payload()
+    pos = 0
+    carry = ""
+    while pos < len(payload):
+        if cte == "base64":
+            end = pos + HTML_CHUNK_SIZE
+            chunk = carry + "".join(payload[pos:end].split())
+            usable = len(chunk) - len(chunk) % 4
+            carry = chunk[usable:]
+            raw = binascii.a2b_base64(chunk[:usable]) if usable else b""
+        else:
+            # Cut after a newline so soft breaks and =XX stay intact
+            end = payload.find("\n", pos + HTML_CHUNK_SIZE)
+            end = len(payload) if end < 0 else end + 1
+            raw = binascii.a2b_qp(payload[pos:end])
+        pos = end
+        yield decoder.decode(raw)
+
+    if carry:
+        yield decoder.decode(binascii.a2b_base64(carry + "=" * (-len(carry) % 4)))
+    yield decoder.decode(b"", final=True)
+
+
+def extract_emails_from_html_part(part) -> set[str]:
+    """
+    Streaming extraction for text/html parts: decode incrementally, tokenize,
+    and scan text nodes as they arrive instead of regexing raw markup.
+    """
+    scanner = _HtmlEmailScanner()
+    for text in _iter_html_part_text(part):
+        scanner.feed(text)
+    scanner.close()
+    return scanner.emails
+
+
 def extract_emails_from_eml(file_path: Path) -> set[str]:
     """
     Extract emails from .eml files:
@@ -48,12 +224,22 @@ def extract_emails_from_eml(file_path: Path) -> set[str]:
     # ---- Body ----
     if msg.is_multipart():
         for part in msg.walk():
-            if part.get_content_type() in ("text/plain", "text/html"):
+            if part.get_content_type() == "text/html":
+                try:
+                    results.update(extract_emails_from_html_part(part))
+                except Exception:
+                    continue
+            elif part.get_content_type() == "text/plain":
                 try:
                     content = part.get_content()
                 except Exception:
                     continue
                 results.update(e.lower() for e in EMAIL_REGEX.findall(content))
+    elif msg.get_content_type() == "text/html":
+        try:
+            results.update(extract_emails_from_html_part(msg))
+        except Exception:
+            pass
     else:
         try:
             content = msg.get_content()
@@ -85,7 +271,7 @@ def extract_emails_from_file(file_path):
                                 e.lower() for e in EMAIL_REGEX.findall(cell)
                             )
                 break
-            except (UnicodeDecodeError, csv.Error):
+            except (UnicodeError, csv.Error):
                 continue
 
     # ---- TXT ----
@@ -97,7 +283,7 @@ def extract_emails_from_file(file_path):
                     e.lower() for e in EMAIL_REGEX.findall(content)
                 )
                 break
-            except UnicodeDecodeError:
+            except UnicodeError:
                 continue
 
     # ---- EML (NEW) ----
@@ -107,12 +293,152 @@ def extract_emails_from_file(file_path):
     else:
         raise ValueError("Unsupported file type. Use CSV, TXT, or EML.")
 
-    # Explicit exclusion (preserved behavior)
-    emails.discard("marc.turner@ukg.com")
+    emails.difference_update(EXCLUDED_EMAILS)
 
     return sorted(emails)
 
 
+# ===============================
+# Spill-to-disk extraction (large inputs)
+# ===============================
+
+def _detect_encoding(file_path: Path) -> str | None:
+    """
+    Return the first entry of ENCODINGS that decodes the whole file,
+    reading it in chunks so memory stays bounded.
+    """
+    for encoding in ENCODINGS:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            with open(file_path, "rb") as f:
+                while chunk := f.read(READ_CHUNK_SIZE):
+                    decoder.decode(chunk)
+                decoder.decode(b"", final=True)
+            return encoding
+        except UnicodeError:
+            continue
+    return None
+
+
+def iter_emails_from_file(file_path):
+    """
+    Streaming counterpart of extract_emails_from_file.
+    Yields lowercased addresses (possibly repeated) without collecting them.
+    """
+    file_path = Path(file_path)
+
+    if not file_path.exists():
+        raise FileNotFoundError("Input file not found.")
+
+    suffix = file_path.suffix.lower()
+
+    # Same fallbacks as extract_emails_from_file: CSV keeps what an abandoned
+    # encoding already produced (duplicates are dropped downstream), TXT uses
+    # the first encoding that decodes the whole file.
+    if suffix == ".csv":
+        for encoding in ENCODINGS:
+            try:
+                with open(file_path, newline="", encoding=encoding) as f:
+                    for row in csv.reader(f):
+                        for cell in row:
+                            for e in EMAIL_REGEX.findall(cell):
+                                yield e.lower()
+                break
+            except (UnicodeError, csv.Error):
+                continue
+
+    elif suffix == ".txt":
+        encoding = _detect_encoding(file_path)
+        if encoding is None:
+            return
+        with open(file_path, encoding=encoding) as f:
+            # Addresses never contain whitespace, so lines are safe units.
+            for line in f:
+                for e in EMAIL_REGEX.findall(line):
+                    yield e.lower()
+
+    elif suffix == ".eml":
+        yield from extract_emails_from_eml(file_path)
+
+    else:
+        raise ValueError("Unsupported file type. Use CSV, TXT, or EML.")
+
+
+def _write_sorted_run(run_dir: Path, index: int, buffer: set[str]) -> Path:
+    run_path = run_dir / f"run-{index:05d}.txt"
+    records = sorted(f"{e.split('@', 1)[1]}\t{e}" for e in buffer)
+    with open(run_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(record + "\n")
+    return run_path
+
+
+def iter_domain_groups_external(file_path, memory_budget=SPILL_MEMORY_BUDGET):
+    """
+    External-sort dedup for inputs larger than RAM.
+
+    Addresses are buffered up to ~memory_budget bytes, written as sorted
+    runs to a temp directory, then k-way merged with duplicates dropped.
+    Each domain's merged addresses go to their own file.
+    Yields (domain, emails) pairs where emails is a lazy iterator. The order
+    matches group_emails_by_domain on the sorted list, i.e. domains ordered
+    by their smallest address, so both paths assign the same hotkeys.
+    """
+    with tempfile.TemporaryDirectory(prefix="email_to_ahk_") as tmp:
+        run_dir = Path(tmp)
+        run_paths = []
+        buffer = set()
+        buffered_bytes = 0
+        first_email = {}  # domain -> smallest address (at most 23 domains)
+
+        for email in iter_emails_from_file(file_path):
+            if email in EXCLUDED_EMAILS or email in buffer:
+                continue
+            buffer.add(email)
+
+            domain = email.split("@", 1)[1]
+            if domain not in first_email:
+                if len(first_email) == len(AVAILABLE_KEYS):
+                    raise RuntimeError("Too many domains (max 23 supported).")
+                first_email[domain] = email
+            elif email < first_email[domain]:
+                first_email[domain] = email
+
+            # Rough per-entry cost of a short str held in a set
+            buffered_bytes += len(email) + 100
+            if buffered_bytes >= memory_budget:
+                run_paths.append(_write_sorted_run(run_dir, len(run_paths), buffer))
+                buffer.clear()
+                buffered_bytes = 0
+
+        if buffer:
+            run_paths.append(_write_sorted_run(run_dir, len(run_paths), buffer))
+            buffer.clear()
+
+        run_files = [open(p, encoding="utf-8") for p in run_paths]
+        domain_paths = {}
+        try:
+            def unique_records():
+                previous = None
+                for record in heapq.merge(*run_files):
+                    if record != previous:
+                        previous = record
+                        yield record.rstrip("\n").split("\t", 1)
+
+            for domain, records in groupby(unique_records(), key=lambda r: r[0]):
+                domain_paths[domain] = run_dir / f"domain-{len(domain_paths):02d}.txt"
+                with open(domain_paths[domain], "w", encoding="utf-8") as f:
+                    for _, email in records:
+                        f.write(email + "\n")
+        finally:
+            for f in run_files:
+                f.close()
+
+        for domain in sorted(first_email, key=first_email.get):
+            with open(domain_paths[domain], encoding="utf-8") as f:
+                yield domain, (line.rstrip("\n") for line in f)
+
+
 # ===============================
 # Grouping
 # ===============================
@@ -130,25 +456,48 @@ def group_emails_by_domain(emails):
 # ===============================
 
 def create_ahk_and_manifest(domain_groups, ahk_path):
+    """
+    domain_groups is a mapping or an iterable of (domain, emails) pairs.
+    Emails are streamed once; the All/Sequential sections are spooled to
+    temp files so no joined copy of the dataset is built in memory.
+    """
     ahk_path = Path(ahk_path)
     manifest_path = ahk_path.with_suffix(".json")
 
+    if hasattr(domain_groups, "items"):
+        domain_groups = domain_groups.items()
+
     manifest = {}
     key_iter = iter(AVAILABLE_KEYS)
 
-    with open(ahk_path, "w", encoding="utf-8") as ahk:
+    with open(ahk_path, "w", encoding="utf-8") as ahk, \
+            tempfile.TemporaryFile("w+", encoding="utf-8") as all_spool, \
+            tempfile.TemporaryFile("w+", encoding="utf-8") as seq_spool:
 
         # ---- Per-domain hotkeys (A → Z sequential) ----
-        for domain, emails in domain_groups.items():
+        first_email = True
+        for domain, emails in domain_groups:
             try:
                 key = next(key_iter)
             except StopIteration:
                 raise RuntimeError("Too many domains (max 23 supported).")
 
-            email_string = ", ".join(emails) + ","
-
             ahk.write(f"^+{key}::\n")
-            ahk.write(f"Clipboard := \"{email_string}\"\n")
+            ahk.write("Clipboard := \"")
+            for i, email in enumerate(emails):
+                ahk.write(f", {email}" if i else email)
+
+                all_spool.write(email if first_email else f", {email}")
+                # Historical output split the joined string on ",", which
+                # kept the leading space on every address but the first.
+                seq_email = email if first_email else f" {email}"
+                seq_spool.write(f"Clipboard := \"{seq_email}\"\n")
+                seq_spool.write("ClipWait\n")
+                seq_spool.write("SendInput, ^v\n")
+                seq_spool.write("Sleep, 2000\n")
+                seq_spool.write("Send, {Enter}\n")
+                first_email = False
+            ahk.write(",\"\n")
             ahk.write("ClipWait\n")
             ahk.write("SendInput, ^v\n")
             ahk.write("Return\n\n")
@@ -159,12 +508,11 @@ def create_ahk_and_manifest(domain_groups, ahk_path):
             }
 
         # ---- All Emails ----
-        all_emails = ", ".join(
-            email for emails in domain_groups.values() for email in emails
-        ) + ","
-
         ahk.write("^+Z::\n")
-        ahk.write(f"Clipboard := \"{all_emails}\"\n")
+        ahk.write("Clipboard := \"")
+        all_spool.seek(0)
+        shutil.copyfileobj(all_spool, ahk)
+        ahk.write(",\"\n")
         ahk.write("ClipWait\n")
         ahk.write("SendInput, ^v\n")
         ahk.write("Return\n\n")
@@ -176,13 +524,8 @@ def create_ahk_and_manifest(domain_groups, ahk_path):
 
         # ---- Sequential ----
         ahk.write("^+R::\n")
-        for email in all_emails.split(","):
-            if email:
-                ahk.write(f"Clipboard := \"{email}\"\n")
-                ahk.write("ClipWait\n")
-                ahk.write("SendInput, ^v\n")
-                ahk.write("Sleep, 2000\n")
-                ahk.write("Send, {Enter}\n")
+        seq_spool.seek(0)
+        shutil.copyfileobj(seq_spool, ahk)
         ahk.write("Return\n\n")
 
         manifest["Ctrl+Shift+R"] = {
@@ -203,7 +546,27 @@ def create_ahk_and_manifest(domain_groups, ahk_path):
 # UI entry point
 # ===============================
 
-def run(input_file_path, ahk_output_path):
+def run(input_file_path, ahk_output_path, spill_to_disk=None,
+        memory_budget=SPILL_MEMORY_BUDGET):
+    """
+    spill_to_disk=None picks the external-sort path automatically for inputs
+    of SPILL_THRESHOLD_BYTES or more; both paths assign the same hotkeys.
+    """
+    input_file_path = Path(input_file_path)
+    if not input_file_path.exists():
+        raise FileNotFoundError("Input file not found.")
+
+    if spill_to_disk is None:
+        spill_to_disk = input_file_path.stat().st_size >= SPILL_THRESHOLD_BYTES
+
+    if spill_to_disk:
+        with closing(iter_domain_groups_external(input_file_path, memory_budget)) as groups:
+            first = next(groups, None)
+            if first is None:
+                raise ValueError("No emails found.")
+            create_ahk_and_manifest(chain([first], groups), ahk_output_path)
+        return
+
     emails = extract_emails_from_file(input_file_path)
     if not emails:
         raise ValueError("No emails found.")
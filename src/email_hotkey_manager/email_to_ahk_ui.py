@@ -1,13 +1,15 @@
 import json
+import math
+import queue
 import subprocess
 import sys
 import time
+import threading
 from pathlib import Path
 
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 
-import pyautogui
 import keyboard  # global hook on Windows
 
 
@@ -19,6 +21,25 @@ try:
 except Exception:
     import email_to_ahk  # type: ignore
 
+try:
+    from . import profile_index
+except Exception:
+    import profile_index  # type: ignore
+
+try:
+    from . import hotkey_dispatch
+except Exception:
+    import hotkey_dispatch  # type: ignore
+
+try:
+    from .storage import (
+        APP_DIR, AHK_DIR, friendly_file_type, meta_path_for, load_meta, save_meta,
+    )
+except Exception:
+    from storage import (  # type: ignore
+        APP_DIR, AHK_DIR, friendly_file_type, meta_path_for, load_meta, save_meta,
+    )
+
 try:
     from .version import VERSION
 except Exception:
@@ -28,8 +49,7 @@ except Exception:
 # =========================
 # App storage
 # =========================
-APP_DIR = Path.home() / ".email_hotkey_generator"
-AHK_DIR = APP_DIR / "ahk"
+SETTINGS_PATH = APP_DIR / "settings.json"
 
 APP_DIR.mkdir(exist_ok=True)
 AHK_DIR.mkdir(exist_ok=True)
@@ -41,27 +61,46 @@ running_ahk: dict[str, subprocess.Popen] = {}
 armed_hotkey: str | None = None
 active_status_setter = None  # callable(str, color)
 active_armed_ui_setter = None  # callable(hotkey|None)
+active_latency_setter = None  # callable(str)
 
 
 # =========================
 # Helpers
 # =========================
-def friendly_file_type(path: str) -> str:
-    ext = Path(path).suffix.lower()
-    if ext == ".csv":
-        return "CSV"
-    if ext == ".txt":
-        return "TXT"
-    if ext == ".eml":
-        return "EML"
-    return "—"
-
-
 def manager_flash(msg: str):
     manager_msg_var.set(msg)
     root.after(4500, lambda: manager_msg_var.set(""))
 
 
+def load_settings() -> dict:
+    """
+    Optional user settings, e.g. {"modifier_delay_ms": 20}.
+    """
+    if SETTINGS_PATH.exists():
+        try:
+            data = json.loads(SETTINGS_PATH.read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+        return data if isinstance(data, dict) else {}
+    return {}
+
+
+def modifier_delay_setting() -> float:
+    """
+    modifier_delay_ms from settings as seconds; anything other than a
+    non-negative number falls back to the default.
+    """
+    value = load_settings().get("modifier_delay_ms")
+    if (
+        isinstance(value, (int, float))
+        and not isinstance(value, bool)
+        and math.isfinite(value)
+        and value >= 0
+    ):
+        return value / 1000
+    return hotkey_dispatch.MODIFIER_DELAY_S
+
+
 def get_ahk_runtime_exe() -> Path | None:
     """
     We run AutoHotkey explicitly so we can terminate it when the hotkey window closes.
@@ -132,25 +171,6 @@ def stop_ahk(profile_name: str):
         running_ahk.pop(profile_name, None)
 
 
-def send_hotkey(hotkey: str):
-    """
-    Send Ctrl+Shift+<key> safely using pyautogui.
-    """
-    parts = hotkey.lower().split("+")
-    modifiers = parts[:-1]
-    key = parts[-1]
-
-    for m in modifiers:
-        pyautogui.keyDown(m)
-        time.sleep(0.02)
-
-    pyautogui.press(key)
-
-    for m in reversed(modifiers):
-        time.sleep(0.02)
-        pyautogui.keyUp(m)
-
-
 def arm_hotkey(hotkey: str, set_status):
     global armed_hotkey
     armed_hotkey = hotkey
@@ -170,27 +190,72 @@ def clear_armed(set_status=None):
 
 def on_trigger_pressed(_event):
     """
-    Global F8 handler. Sends armed hotkey and suppresses F8.
+    Global F8 handler. Queues the armed hotkey for the sender thread and
+    suppresses F8. Runs on the hook thread, so it never touches Tk.
     """
     global armed_hotkey
 
-    if armed_hotkey:
-        try:
-            send_hotkey(armed_hotkey)
-            if active_status_setter:
-                active_status_setter(f"Sent {armed_hotkey}", "green")
-        finally:
-            # Disarm after use
-            if active_armed_ui_setter:
-                active_armed_ui_setter(None)
-            armed_hotkey = None
+    triggered_at = time.perf_counter()
+    hotkey = armed_hotkey
+    if hotkey:
+        # Disarm after use (UI catches up in poll_dispatch_results)
+        armed_hotkey = None
+        dispatcher.submit(hotkey, triggered_at)
         return False  # suppress F8
 
 
+def poll_dispatch_results():
+    """
+    Drain sender-thread outcomes on the Tk thread.
+    """
+    while True:
+        try:
+            hotkey, latency, error = dispatcher.results.get_nowait()
+        except queue.Empty:
+            break
+
+        if active_armed_ui_setter and armed_hotkey is None:
+            active_armed_ui_setter(None)
+        if active_status_setter:
+            if error is not None:
+                active_status_setter(f"Failed to send {hotkey}: {error}", "red")
+            else:
+                active_status_setter(f"Sent {hotkey} ({latency * 1000:.1f} ms)", "green")
+        if active_latency_setter:
+            active_latency_setter(dispatcher.recorder.summary())
+
+    root.after(30, poll_dispatch_results)
+
+
+dispatcher = hotkey_dispatch.HotkeyDispatcher(
+    hotkey_dispatch.PyAutoGuiBackend(),
+    modifier_delay=modifier_delay_setting(),
+)
+
 # Register global listener ONCE
 keyboard.on_press_key("f8", on_trigger_pressed)
 
 
+# =========================
+# Search index (background)
+# =========================
+# profile_index calls (callable, args) run here one at a time, in order, so
+# SQLite writes never block the Tk thread or contend with each other.
+index_jobs: queue.Queue = queue.Queue()
+
+
+def index_worker():
+    while True:
+        job, args = index_jobs.get()
+        try:
+            job(*args)
+        except Exception:
+            pass  # index is rebuilt by sync() on next launch
+
+
+threading.Thread(target=index_worker, name="profile-index", daemon=True).start()
+
+
 # =========================
 # Scrollable Frame
 # =========================
@@ -214,25 +279,175 @@ class ScrollableFrame(ttk.Frame):
 
 
 # =========================
-# Profile metadata (non-breaking)
+# Virtualized hotkey list
 # =========================
-def meta_path_for(ahk_path: Path) -> Path:
-    return ahk_path.with_suffix(".meta.json")
+class VirtualHotkeyList(ttk.Frame):
+    """
+    Hotkey rows for a manifest, materializing only the rows in view.
+    - A small pool of row widgets is rebound to entries as you scroll
+    - Entries are pulled from a (hotkey, info) iterator a page at a time
+    - ARM state changes touch only the previously/newly armed rows, unless
+      the list flips between armed and unarmed (then visible rows only)
+    """
+    ROW_HEIGHT = 38
+    PAGE_SIZE = 50
 
+    def __init__(self, parent, on_arm):
+        super().__init__(parent)
+        self.on_arm = on_arm
 
-def load_meta(ahk_path: Path) -> dict:
-    p = meta_path_for(ahk_path)
-    if p.exists():
+        self.entries: list[tuple[str, dict]] = []
+        self.visible: list[int] = []  # indices into entries (after filter)
+        self.filter_text = ""
+        self.armed: str | None = None
+
+        self._source = None
+        self._top = 0  # scroll offset in pixels
+        self._pool: list[dict] = []
+        self._row_for: dict[str, dict] = {}  # hotkey -> pool row showing it
+
+        self.viewport = tk.Frame(self, highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.viewport.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.viewport.bind("<Configure>", lambda e: self._render())
+        self.viewport.bind("<MouseWheel>", self._on_wheel)
+
+    # ---- Data ----
+
+    def load(self, source):
+        self._source = iter(source)
+        self.entries.clear()
+        self._load_page()
+        self._apply_filter()
+
+    def _load_page(self, drain=False) -> bool:
+        if self._source is None:
+            return False
         try:
-            return json.loads(p.read_text(encoding="utf-8"))
-        except Exception:
-            return {}
-    return {}
+            loaded = 0
+            while drain or loaded < self.PAGE_SIZE:
+                self.entries.append(next(self._source))
+                loaded += 1
+        except StopIteration:
+            self._source = None
+        return True
+
+    def _matches(self, index: int) -> bool:
+        hotkey, info = self.entries[index]
+        return (
+            self.filter_text in str(info.get("label", hotkey)).lower()
+            or self.filter_text in hotkey.lower()
+        )
+
+    def _apply_filter(self):
+        self.visible = [i for i in range(len(self.entries)) if self._matches(i)]
+
+    def set_filter(self, text: str):
+        self.filter_text = text.strip().lower()
+        if self.filter_text:
+            self._load_page(drain=True)  # filtering needs every entry
+        self._apply_filter()
+        self._top = 0
+        self._render()
+
+    # ---- Scrolling ----
 
+    def _max_top(self) -> int:
+        return max(0, len(self.visible) * self.ROW_HEIGHT - self.viewport.winfo_height())
 
-def save_meta(ahk_path: Path, meta: dict):
-    p = meta_path_for(ahk_path)
-    p.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    def _scroll_to(self, top):
+        self._top = int(min(max(0, top), self._max_top()))
+        self._render()
+
+    def yview(self, *args):
+        if args[0] == "moveto":
+            self._scroll_to(float(args[1]) * len(self.visible) * self.ROW_HEIGHT)
+        elif args[0] == "scroll":
+            step = self.ROW_HEIGHT if args[2] == "units" else self.viewport.winfo_height()
+            self._scroll_to(self._top + int(args[1]) * step)
+
+    def _on_wheel(self, event):
+        self._scroll_to(self._top - int(event.delta / 120) * self.ROW_HEIGHT)
+        # Stop here so ScrollableFrame's bind_all doesn't scroll the manager too
+        return "break"
+
+    # ---- Rendering ----
+
+    def _make_row(self) -> dict:
+        frame = tk.Frame(self.viewport, bd=1, relief="flat")
+        label = tk.Label(frame, anchor="w")
+        label.pack(side="left", fill="x", expand=True, padx=(6, 6), pady=4)
+        row = {"frame": frame, "label": label, "hotkey": None}
+        btn = tk.Button(
+            frame,
+            text="ARM",
+            width=8,
+            command=lambda r=row: r["hotkey"] and self.on_arm(r["hotkey"]),
+        )
+        btn.pack(side="right", padx=(6, 0), pady=4)
+        row["btn"] = btn
+        for w in (frame, label, btn):
+            w.bind("<MouseWheel>", self._on_wheel)
+        return row
+
+    def _style_row(self, row: dict):
+        bg = self.viewport.cget("bg")
+        is_armed = self.armed is not None and row["hotkey"] == self.armed
+        if is_armed:
+            bg = "#e9f2ff"
+        row["frame"].config(bg=bg)
+        row["label"].config(bg=bg)
+        row["btn"].config(state="disabled" if self.armed and not is_armed else "normal")
+
+    def _render(self):
+        height = self.viewport.winfo_height()
+        first = self._top // self.ROW_HEIGHT
+        count = height // self.ROW_HEIGHT + 2
+
+        # Page in more entries as the view nears the end of what's loaded
+        while self._source is not None and first + count >= len(self.visible):
+            if not self._load_page():
+                break
+            self._apply_filter()
+
+        while len(self._pool) < count:
+            self._pool.append(self._make_row())
+
+        self._row_for.clear()
+        for i, row in enumerate(self._pool):
+            pos = first + i
+            if i >= count or pos >= len(self.visible):
+                row["frame"].place_forget()
+                row["hotkey"] = None
+                continue
+            hotkey, info = self.entries[self.visible[pos]]
+            if row["hotkey"] != hotkey:
+                row["hotkey"] = hotkey
+                row["label"].config(text=info.get("label", hotkey))
+            self._style_row(row)
+            self._row_for[hotkey] = row
+            row["frame"].place(
+                x=0, y=pos * self.ROW_HEIGHT - self._top,
+                relwidth=1, height=self.ROW_HEIGHT,
+            )
+
+        total = len(self.visible) * self.ROW_HEIGHT
+        if total <= height or total == 0:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self._top / total, (self._top + height) / total)
+
+    def set_armed(self, hotkey: str | None):
+        previous, self.armed = self.armed, hotkey
+        if (previous is None) != (hotkey is None):
+            # Other rows' ARM buttons toggle enabled/disabled
+            rows = self._row_for.values()
+        else:
+            rows = [self._row_for[h] for h in (previous, hotkey) if h in self._row_for]
+        for row in rows:
+            self._style_row(row)
 
 
 # =========================
@@ -275,6 +490,8 @@ def delete_profile(profile, row_frame):
         profile["manifest"].unlink(missing_ok=True)
         meta_path_for(profile["ahk"]).unlink(missing_ok=True)
 
+        index_jobs.put((profile_index.remove_profile, (name,)))
+
         row_frame.destroy()
         manager_flash(f"Deleted profile: {name}")
     except Exception as e:
@@ -307,13 +524,16 @@ def open_hotkey_window(profile):
         foreground="#444",
     ).pack(anchor="w", pady=(4, 0))
 
+    filter_row = ttk.Frame(header)
+    filter_row.pack(fill="x", pady=(8, 0))
+    ttk.Label(filter_row, text="Filter:").pack(side="left")
+    filter_entry = ttk.Entry(filter_row)
+    filter_entry.pack(side="left", fill="x", expand=True, padx=(8, 0))
+
     # Hotkeys list
     list_frame = ttk.Frame(window, padding=(14, 8))
     list_frame.pack(fill="both", expand=True)
 
-    hotkey_scroll = ScrollableFrame(list_frame)
-    hotkey_scroll.pack(fill="both", expand=True)
-
     # Status bar (moved here)
     status_var = tk.StringVar(value="Ready. Choose a hotkey and click ARM.")
     status = tk.Label(window, textvariable=status_var, anchor="w", relief=tk.SUNKEN, padx=10)
@@ -324,6 +544,30 @@ def open_hotkey_window(profile):
         status_var.set(msg)
         status.update_idletasks()
 
+    # Trigger latency (F8 → keystroke)
+    latency_bar = ttk.Frame(window, padding=(14, 4))
+    latency_bar.pack(side=tk.BOTTOM, fill=tk.X)
+
+    latency_var = tk.StringVar(value=dispatcher.recorder.summary())
+    ttk.Label(latency_bar, textvariable=latency_var, foreground="#444").pack(side="left")
+
+    def export_latency():
+        path = filedialog.asksaveasfilename(
+            parent=window,
+            title="Export Trigger Latency",
+            defaultextension=".csv",
+            filetypes=[("CSV Files", "*.csv"), ("JSON Files", "*.json")],
+        )
+        if not path:
+            return
+        try:
+            dispatcher.recorder.export(path)
+            set_status(f"Latency exported to {Path(path).name}", "green")
+        except Exception as e:
+            set_status(f"Export failed: {e}", "red")
+
+    ttk.Button(latency_bar, text="Export…", command=export_latency).pack(side="right")
+
     # Start AHK process now (execution window owns lifecycle)
     try:
         ensure_ahk_running(profile["name"], profile["ahk"], set_status)
@@ -338,53 +582,33 @@ def open_hotkey_window(profile):
         set_status(f"Failed to load manifest: {e}", "red")
         manifest = {}
 
-    # Track UI row widgets to support highlight/disable
-    row_widgets = {}  # hotkey -> {"frame": tk.Frame, "btn": tk.Button}
+    # Hotkey rows (virtualized; rows are materialized a page at a time)
+    hotkey_list = VirtualHotkeyList(list_frame, on_arm=lambda h: arm_hotkey(h, set_status))
+    hotkey_list.pack(fill="both", expand=True)
+    hotkey_list.load(manifest.items())
 
-    # Use tk widgets (easier to highlight background than ttk)
-    for hotkey, info in manifest.items():
-        row = tk.Frame(hotkey_scroll.inner, bd=1, relief="flat")
-        row.pack(fill="x", pady=4)
-
-        label = tk.Label(row, text=info.get("label", hotkey), anchor="w")
-        label.pack(side="left", fill="x", expand=True, padx=(6, 6), pady=4)
-
-        btn = tk.Button(
-            row,
-            text="ARM",
-            width=8,
-            command=lambda h=hotkey: arm_hotkey(h, set_status),
-        )
-        btn.pack(side="right", padx=(6, 0), pady=4)
-
-        row_widgets[hotkey] = {"frame": row, "btn": btn, "label": label}
+    filter_entry.bind("<KeyRelease>", lambda e: hotkey_list.set_filter(filter_entry.get()))
 
     def set_armed_ui(armed: str | None):
         # Highlight armed row & disable other ARM buttons
-        for hk, w in row_widgets.items():
-            is_armed = (armed is not None and hk == armed)
-            if is_armed:
-                w["frame"].config(bg="#e9f2ff")
-                w["label"].config(bg="#e9f2ff")
-                w["btn"].config(state="normal")
-            else:
-                w["frame"].config(bg=window.cget("bg"))
-                w["label"].config(bg=window.cget("bg"))
-                w["btn"].config(state="disabled" if armed else "normal")
+        hotkey_list.set_armed(armed)
 
     # Make this window the active execution surface
-    global active_status_setter, active_armed_ui_setter
+    global active_status_setter, active_armed_ui_setter, active_latency_setter
     active_status_setter = set_status
     active_armed_ui_setter = set_armed_ui
+    active_latency_setter = latency_var.set
     set_armed_ui(armed_hotkey)
 
     def on_close():
         # If this window is active, clear global execution callbacks & disarm
-        global active_status_setter, active_armed_ui_setter
+        global active_status_setter, active_armed_ui_setter, active_latency_setter
         if active_status_setter == set_status:
             active_status_setter = None
         if active_armed_ui_setter == set_armed_ui:
             active_armed_ui_setter = None
+        if active_latency_setter == latency_var.set:
+            active_latency_setter = None
 
         clear_armed()
 
@@ -438,6 +662,8 @@ def run_generator():
     try:
         email_to_ahk.run(input_path, ahk_path)
 
+        index_jobs.put((profile_index.index_profile, (ahk_path,)))
+
         # Compute hotkey count from manifest
         hotkey_count = None
         try:
@@ -546,6 +772,13 @@ ttk.Label(gen_card, textvariable=manager_msg_var, foreground="#0a5").grid(row=2,
 profiles_card = ttk.LabelFrame(content, text="Saved Profiles", padding=(14, 10))
 profiles_card.pack(fill="both", expand=True)
 
+search_row = ttk.Frame(profiles_card)
+search_row.pack(fill="x", pady=(0, 8))
+search_row.columnconfigure(0, weight=1)
+
+search_entry = ttk.Entry(search_row)
+search_entry.grid(row=0, column=0, sticky="ew")
+
 profiles_scroll = ScrollableFrame(profiles_card)
 profiles_scroll.pack(fill="both", expand=True)
 
@@ -558,12 +791,14 @@ def profile_row_text(p: dict) -> str:
     return f"{p['name']}   •   {t}"
 
 
-def rebuild_profiles_list():
+def rebuild_profiles_list(only_names: set[str] | None = None):
     # Clear
     for w in profiles_scroll.inner.winfo_children():
         w.destroy()
 
     for p in load_profiles():
+        if only_names is not None and p["name"] not in only_names:
+            continue
         row = ttk.Frame(profiles_scroll.inner)
         row.pack(fill="x", padx=4, pady=4)
 
@@ -582,6 +817,56 @@ def rebuild_profiles_list():
         ).pack(side="right", padx=(10, 0))
 
 
+def search_profiles(_event=None):
+    query = search_entry.get().strip()
+    if not query:
+        rebuild_profiles_list()
+        return
+    try:
+        names = profile_index.matching_profiles(query)
+    except Exception as e:
+        messagebox.showerror("Search failed", str(e))
+        return
+    rebuild_profiles_list(names)
+    manager_flash(f"{len(names)} profile(s) contain '{query}'.")
+
+
+def clear_search():
+    search_entry.delete(0, tk.END)
+    rebuild_profiles_list()
+
+
+search_entry.bind("<Return>", search_profiles)
+search_btn = ttk.Button(search_row, text="Search", command=search_profiles)
+search_btn.grid(row=0, column=1, padx=(10, 0))
+clear_btn = ttk.Button(search_row, text="Clear", command=clear_search)
+clear_btn.grid(row=0, column=2, padx=(6, 0))
+
+
+def start_index_sync():
+    """
+    Queue a catch-up of the search index with AHK_DIR (first launch may have
+    to read thousands of scripts); search is enabled when it has run.
+    """
+    done = threading.Event()
+
+    def check_done():
+        if not done.is_set():
+            root.after(100, check_done)
+            return
+        for w in (search_entry, search_btn, clear_btn):
+            w.state(["!disabled"])
+
+    for w in (search_entry, search_btn, clear_btn):
+        w.state(["disabled"])
+    index_jobs.put((profile_index.sync, (AHK_DIR,)))
+    index_jobs.put((done.set, ()))
+    check_done()
+
+
+start_index_sync()
+
 rebuild_profiles_list()
 
+root.after(30, poll_dispatch_results)
 root.mainloop()
@@ -0,0 +1,197 @@
+import csv
+import json
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+
+# ===============================
+# Constants
+# ===============================
+
+# Pause around each modifier key so the target app registers it
+MODIFIER_DELAY_S = 0.02
+
+LATENCY_PERCENTILES = (50, 90, 99)
+LATENCY_HISTORY = 1000
+
+
+# ===============================
+# Input backends
+# ===============================
+
+class PyAutoGuiBackend:
+    """
+    Sends real keystrokes via pyautogui (imported lazily).
+    """
+    def __init__(self):
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def key_down(self, key: str):
+        self._pyautogui.keyDown(key)
+
+    def key_up(self, key: str):
+        self._pyautogui.keyUp(key)
+
+    def press(self, key: str):
+        self._pyautogui.press(key)
+
+
+class FakeBackend:
+    """
+    Records key events instead of sending them (tests, non-Windows hosts).
+    """
+    def __init__(self):
+        self.events: list[tuple[str, str]] = []
+
+    def key_down(self, key: str):
+        self.events.append(("down", key))
+
+    def key_up(self, key: str):
+        self.events.append(("up", key))
+
+    def press(self, key: str):
+        self.events.append(("press", key))
+
+
+# ===============================
+# Latency instrumentation
+# ===============================
+
+class LatencyRecorder:
+    """
+    Keeps the most recent trigger-to-keystroke latencies (seconds).
+    Thread-safe: written by the sender thread, read by the UI.
+    """
+    def __init__(self, maxlen=LATENCY_HISTORY):
+        self._samples = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def record(self, hotkey: str, seconds: float):
+        with self._lock:
+            self._samples.append((time.time(), hotkey, seconds))
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def percentiles(self, ps=LATENCY_PERCENTILES) -> dict[int, float]:
+        """
+        Nearest-rank percentiles in milliseconds; empty if nothing recorded.
+        """
+        with self._lock:
+            values = sorted(s for _, _, s in self._samples)
+        if not values:
+            return {}
+        result = {}
+        for p in ps:
+            rank = max(1, -(-p * len(values) // 100))  # ceil
+            result[p] = values[rank - 1] * 1000
+        return result
+
+    def summary(self) -> str:
+        pct = self.percentiles()
+        if not pct:
+            return "Latency: no triggers yet"
+        parts = [f"p{p} {ms:.1f} ms" for p, ms in pct.items()]
+        return "Latency: " + "  •  ".join(parts) + f"  (n={self.count()})"
+
+    def export(self, path):
+        """
+        Write raw samples to .json or .csv (by suffix).
+        """
+        path = Path(path)
+        with self._lock:
+            samples = list(self._samples)
+
+        if path.suffix.lower() == ".json":
+            path.write_text(json.dumps({
+                "percentiles_ms": {f"p{p}": ms for p, ms in self.percentiles().items()},
+                "samples": [
+                    {"timestamp": ts, "hotkey": hk, "latency_ms": s * 1000}
+                    for ts, hk, s in samples
+                ],
+            }, indent=2), encoding="utf-8")
+            return
+
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["timestamp", "hotkey", "latency_ms"])
+            for ts, hk, s in samples:
+                writer.writerow([f"{ts:.3f}", hk, f"{s * 1000:.3f}"])
+
+
+# ===============================
+# Dispatcher
+# ===============================
+
+class HotkeyDispatcher:
+    """
+    Sends hotkeys from a dedicated thread so the keyboard hook callback only
+    enqueues and returns. Outcomes are posted to `results` as
+    (hotkey, latency_seconds | None, error | None) for the UI thread to drain.
+    """
+    def __init__(self, backend, modifier_delay=MODIFIER_DELAY_S, recorder=None):
+        self.backend = backend
+        self.modifier_delay = modifier_delay
+        self.recorder = recorder or LatencyRecorder()
+        self.results: queue.Queue = queue.Queue()
+
+        self._jobs: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="hotkey-sender", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, hotkey: str, triggered_at: float | None = None):
+        """
+        Queue a hotkey; triggered_at is a time.perf_counter() timestamp.
+        """
+        if triggered_at is None:
+            triggered_at = time.perf_counter()
+        self._jobs.put((hotkey, triggered_at))
+
+    def send(self, hotkey: str) -> float:
+        """
+        Send e.g. "Ctrl+Shift+A" on the calling thread.
+        Returns the perf_counter() time the main key was pressed.
+        """
+        parts = hotkey.lower().split("+")
+        modifiers = parts[:-1]
+        key = parts[-1]
+
+        for m in modifiers:
+            self.backend.key_down(m)
+            if self.modifier_delay:
+                time.sleep(self.modifier_delay)
+
+        self.backend.press(key)
+        pressed_at = time.perf_counter()
+
+        for m in reversed(modifiers):
+            if self.modifier_delay:
+                time.sleep(self.modifier_delay)
+            self.backend.key_up(m)
+
+        return pressed_at
+
+    def stop(self, timeout=1.0):
+        self._jobs.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            hotkey, triggered_at = job
+            try:
+                latency = self.send(hotkey) - triggered_at
+            except Exception as e:
+                self.results.put((hotkey, None, e))
+                continue
+            self.recorder.record(hotkey, latency)
+            self.results.put((hotkey, latency, None))
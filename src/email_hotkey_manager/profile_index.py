@@ -0,0 +1,218 @@
+import sys
+import sqlite3
+import argparse
+from contextlib import closing
+from pathlib import Path
+
+try:
+    from . import email_to_ahk
+except Exception:
+    import email_to_ahk  # type: ignore
+
+try:
+    from .storage import APP_DIR, AHK_DIR
+except Exception:
+    from storage import APP_DIR, AHK_DIR  # type: ignore
+
+
+# ===============================
+# Constants
+# ===============================
+
+INDEX_PATH = APP_DIR / "profile_index.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    name  TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term    TEXT NOT NULL,
+    kind    TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    PRIMARY KEY (term, kind, profile)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_by_profile ON postings (profile);
+"""
+
+CLIPBOARD_PREFIX = 'Clipboard := "'
+
+
+# ===============================
+# Helpers
+# ===============================
+
+def _connect(index_path) -> sqlite3.Connection:
+    index_path = Path(index_path)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(index_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _prefix_upper_bound(prefix: str) -> str:
+    # Smallest string greater than every string starting with prefix
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def profile_terms(ahk_path: Path) -> set[str]:
+    """
+    Read addresses back out of a generated .ahk script (Clipboard lines).
+    """
+    emails = set()
+    with open(ahk_path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith(CLIPBOARD_PREFIX):
+                emails.update(
+                    e.lower() for e in email_to_ahk.EMAIL_REGEX.findall(line)
+                )
+    return emails
+
+
+def _replace_postings(conn, name: str, ahk_path: Path):
+    emails = profile_terms(ahk_path)
+    domains = {e.split("@", 1)[1] for e in emails}
+
+    conn.execute("DELETE FROM postings WHERE profile = ?", (name,))
+    conn.executemany(
+        "INSERT INTO postings (term, kind, profile) VALUES (?, 'address', ?)",
+        ((e, name) for e in emails),
+    )
+    conn.executemany(
+        "INSERT INTO postings (term, kind, profile) VALUES (?, 'domain', ?)",
+        ((d, name) for d in domains),
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO profiles (name, mtime) VALUES (?, ?)",
+        (name, ahk_path.stat().st_mtime),
+    )
+
+
+# ===============================
+# Incremental updates
+# ===============================
+
+def index_profile(ahk_path, index_path=INDEX_PATH):
+    """
+    (Re)index one profile. Call after a profile is generated.
+    """
+    ahk_path = Path(ahk_path)
+    with closing(_connect(index_path)) as conn, conn:
+        _replace_postings(conn, ahk_path.stem, ahk_path)
+
+
+def remove_profile(name: str, index_path=INDEX_PATH):
+    """
+    Drop a profile from the index. Call after a profile is deleted.
+    """
+    with closing(_connect(index_path)) as conn, conn:
+        conn.execute("DELETE FROM postings WHERE profile = ?", (name,))
+        conn.execute("DELETE FROM profiles WHERE name = ?", (name,))
+
+
+def sync(ahk_dir=AHK_DIR, index_path=INDEX_PATH) -> int:
+    """
+    Bring the index in line with ahk_dir: reindex new or modified profiles
+    (by mtime) and drop deleted ones. Returns the number of changes.
+    """
+    on_disk = {p.stem: p for p in Path(ahk_dir).glob("*.ahk")}
+    changes = 0
+
+    with closing(_connect(index_path)) as conn, conn:
+        indexed = dict(conn.execute("SELECT name, mtime FROM profiles"))
+
+        for name in indexed.keys() - on_disk.keys():
+            conn.execute("DELETE FROM postings WHERE profile = ?", (name,))
+            conn.execute("DELETE FROM profiles WHERE name = ?", (name,))
+            changes += 1
+
+        for name, ahk_path in on_disk.items():
+            if indexed.get(name) != ahk_path.stat().st_mtime:
+                _replace_postings(conn, name, ahk_path)
+                changes += 1
+
+    return changes
+
+
+# ===============================
+# Queries
+# ===============================
+
+def search(query: str, limit=100, index_path=INDEX_PATH) -> list[dict]:
+    """
+    Prefix search over addresses and domains.
+    Returns [{"term", "kind", "profiles"}] ordered by term, at most limit terms.
+    """
+    query = query.strip().lower()
+    if not query:
+        return []
+
+    with closing(_connect(index_path)) as conn:
+        rows = conn.execute(
+            """
+            SELECT term, kind, group_concat(profile, char(10))
+            FROM postings
+            WHERE term >= ? AND term < ?
+            GROUP BY term, kind
+            ORDER BY term, kind
+            LIMIT ?
+            """,
+            (query, _prefix_upper_bound(query), limit),
+        ).fetchall()
+
+    return [
+        {"term": term, "kind": kind, "profiles": sorted(profiles.split("\n"))}
+        for term, kind, profiles in rows
+    ]
+
+
+def matching_profiles(query: str, index_path=INDEX_PATH) -> set[str]:
+    """
+    Names of all profiles containing an address or domain starting with query.
+    """
+    query = query.strip().lower()
+    if not query:
+        return set()
+
+    with closing(_connect(index_path)) as conn:
+        rows = conn.execute(
+            "SELECT DISTINCT profile FROM postings WHERE term >= ? AND term < ?",
+            (query, _prefix_upper_bound(query)),
+        )
+        return {name for (name,) in rows}
+
+
+# ===============================
+# CLI support
+# ===============================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Search saved hotkey profiles by address or domain."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    q = sub.add_parser("query", help="Prefix search for an address or domain.")
+    q.add_argument("term")
+    q.add_argument("--limit", type=int, default=100)
+
+    sub.add_parser("sync", help="Update the index from the profiles folder.")
+
+    args = parser.parse_args(argv)
+
+    sync()
+    if args.command == "sync":
+        print("Index up to date.")
+        return 0
+
+    results = search(args.term, limit=args.limit)
+    if not results:
+        print("No matches.")
+        return 1
+    for r in results:
+        print(f"{r['term']}  ({r['kind']})  ->  {', '.join(r['profiles'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,484 @@
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+try:
+    from . import email_to_ahk
+except Exception:
+    import email_to_ahk  # type: ignore
+
+try:
+    from . import profile_index
+except Exception:
+    import profile_index  # type: ignore
+
+try:
+    from .storage import APP_DIR, AHK_DIR, friendly_file_type, save_meta
+except Exception:
+    from storage import APP_DIR, AHK_DIR, friendly_file_type, save_meta  # type: ignore
+
+try:
+    from .version import VERSION
+except Exception:
+    VERSION = "1.1.1"
+
+
+# ===============================
+# Constants
+# ===============================
+
+CACHE_DIR = APP_DIR / "service_cache"
+
+HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 4
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Least recently used cache entries beyond this are deleted
+MAX_CACHE_ENTRIES = 256
+# Finished jobs kept for GET /jobs; older ones are forgotten
+MAX_FINISHED_JOBS = 1000
+
+
+# ===============================
+# Helpers
+# ===============================
+
+def input_hash(input_path: Path) -> str:
+    """
+    Cache key: generator version + file type + file contents, so upgrades
+    that change extraction or output never serve stale results.
+    """
+    prefix = f"{VERSION}\0{email_to_ahk.FORMAT_VERSION}\0{input_path.suffix.lower()}\0"
+    h = hashlib.sha256(prefix.encode("utf-8"))
+    with open(input_path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def is_manifest(path: Path) -> bool:
+    """
+    True if path holds a hotkey manifest as written by create_ahk_and_manifest.
+    """
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return False
+    return (
+        isinstance(data, dict)
+        and bool(data)
+        and all(
+            isinstance(info, dict) and info.get("type") in ("domain", "all", "sequential")
+            for info in data.values()
+        )
+    )
+
+
+def _generate(input_path: str, cache_dir: str, key: str):
+    """
+    Worker: generate into a scratch dir, then move .json + .ahk into the
+    cache. The .ahk is moved last, so its presence marks a complete entry.
+    """
+    cache_dir = Path(cache_dir)
+    with tempfile.TemporaryDirectory(dir=cache_dir) as tmp:
+        scratch = Path(tmp) / f"{key}.ahk"
+        email_to_ahk.run(input_path, scratch)
+        os.replace(scratch.with_suffix(".json"), cache_dir / f"{key}.json")
+        os.replace(scratch, cache_dir / f"{key}.ahk")
+
+
+# ===============================
+# Service
+# ===============================
+
+class GenerationService:
+    """
+    Runs generation jobs on a bounded process pool.
+    - Identical in-flight requests (same input contents + output) share a job
+    - Same input with a different output shares one generation
+    - Finished results are cached by input hash and copied on later hits;
+      the cache keeps MAX_CACHE_ENTRIES, evicting least recently used
+    - Outputs must live under AHK_DIR (or an explicitly allowed directory)
+      and never replace a .json that isn't a hotkey manifest
+    - Outputs get the same .meta.json as UI-made profiles; those written
+      straight into AHK_DIR are added to the search index
+    - If a worker process dies, the pool is replaced; the submit that
+      finds it broken raises BrokenProcessPool
+    """
+    def __init__(self, max_workers=DEFAULT_WORKERS, cache_dir=CACHE_DIR,
+                 output_dirs=()):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.output_dirs = [Path(d).resolve() for d in (AHK_DIR, *output_dirs)]
+        self.pool = ProcessPoolExecutor(max_workers=max_workers)
+        self.max_workers = max_workers
+
+        self._lock = threading.RLock()
+        self._jobs: dict[str, dict] = {}
+        self._inflight_jobs: dict[tuple[str, str], str] = {}  # (hash, output) -> job id
+        self._generations = {}  # hash -> Future
+        self._finished = deque()  # job ids, oldest first
+
+        self.started_at = time.time()
+        self.counters = {
+            "submitted": 0,
+            "deduplicated": 0,
+            "cache_hits": 0,
+            "generated": 0,
+            "completed": 0,
+            "failed": 0,
+        }
+        self._total_duration = 0.0
+
+        self._prune_cache()
+
+    # ---- Public API ----
+
+    def submit(self, input_path, output_path) -> dict:
+        input_path = Path(input_path).resolve()
+        output_path = Path(output_path).resolve()
+
+        if not input_path.is_file():
+            raise FileNotFoundError("Input file not found.")
+        self._check_output(output_path)
+
+        key = input_hash(input_path)
+
+        with self._lock:
+            self.counters["submitted"] += 1
+
+            job_id = self._inflight_jobs.get((key, str(output_path)))
+            if job_id is not None:
+                self.counters["deduplicated"] += 1
+                return self._job_view(job_id)
+
+            job_id = uuid.uuid4().hex[:12]
+            job = {
+                "id": job_id,
+                "input_path": str(input_path),
+                "output_path": str(output_path),
+                "input_hash": key,
+                "status": "queued",
+                "cached": False,
+                "error": None,
+                "submitted_at": time.time(),
+                "finished_at": None,
+            }
+
+            cached_ahk = self.cache_dir / f"{key}.ahk"
+            if cached_ahk.exists():
+                os.utime(cached_ahk)  # mark as recently used
+                self.counters["cache_hits"] += 1
+                job["cached"] = True
+                generation = None
+            else:
+                generation = self._generations.get(key)
+                if generation is None:
+                    pool = self.pool
+                    try:
+                        generation = pool.submit(
+                            _generate, str(input_path), str(self.cache_dir), key
+                        )
+                    except BrokenProcessPool:
+                        self._replace_pool(pool)
+                        raise
+                    self._generations[key] = generation
+                    self.counters["generated"] += 1
+                    generation.add_done_callback(
+                        lambda f, k=key, p=pool: self._forget_generation(k, f, p)
+                    )
+                self._inflight_jobs[(key, str(output_path))] = job_id
+                job["_generation"] = generation
+
+            self._jobs[job_id] = job
+
+        if generation is None:
+            self._finish(job_id, None)
+        else:
+            generation.add_done_callback(lambda f, j=job_id: self._finish(j, f))
+
+        return self.job(job_id)
+
+    def job(self, job_id: str) -> dict | None:
+        with self._lock:
+            if job_id not in self._jobs:
+                return None
+            return self._job_view(job_id)
+
+    def jobs(self) -> list[dict]:
+        with self._lock:
+            return [self._job_view(j) for j in self._jobs]
+
+    def metrics(self) -> dict:
+        with self._lock:
+            uptime = time.time() - self.started_at
+            statuses = [self._status(j) for j in self._jobs.values()]
+            done = self.counters["completed"]
+            return {
+                **self.counters,
+                "queued": statuses.count("queued"),
+                "running": statuses.count("running"),
+                "workers": self.max_workers,
+                "uptime_s": round(uptime, 3),
+                "avg_job_duration_s": round(self._total_duration / done, 4) if done else None,
+                "throughput_per_min": round(done / uptime * 60, 3) if uptime else 0.0,
+            }
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+    # ---- Internals ----
+
+    def _check_output(self, output_path: Path):
+        if output_path.suffix.lower() != ".ahk":
+            raise ValueError("output_path must end in .ahk")
+        if not any(output_path.is_relative_to(d) for d in self.output_dirs):
+            raise ValueError(
+                "output_path must be inside "
+                + " or ".join(str(d) for d in self.output_dirs)
+            )
+        manifest_path = output_path.with_suffix(".json")
+        if manifest_path.exists() and not is_manifest(manifest_path):
+            raise ValueError(f"Refusing to overwrite {manifest_path}: not a hotkey manifest.")
+
+    def _forget_generation(self, key: str, generation, pool):
+        with self._lock:
+            self._generations.pop(key, None)
+            self._prune_cache()
+        if not generation.cancelled() and isinstance(generation.exception(), BrokenProcessPool):
+            self._replace_pool(pool)
+
+    def _replace_pool(self, broken):
+        """
+        Swap in a fresh pool unless another thread already replaced `broken`.
+        """
+        with self._lock:
+            if self.pool is not broken:
+                return
+            self.pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _prune_cache(self):
+        """
+        Delete least recently used entries beyond MAX_CACHE_ENTRIES, sparing
+        any that in-flight jobs are still waiting to copy.
+        """
+        busy = set(self._generations) | {key for key, _ in self._inflight_jobs}
+        entries = []
+        for ahk in self.cache_dir.glob("*.ahk"):
+            try:
+                entries.append((ahk.stat().st_mtime, ahk))
+            except OSError:
+                continue
+        entries.sort(reverse=True)
+        for _, ahk in entries[MAX_CACHE_ENTRIES:]:
+            if ahk.stem in busy:
+                continue
+            ahk.unlink(missing_ok=True)
+            ahk.with_suffix(".json").unlink(missing_ok=True)
+
+    def _finish(self, job_id: str, generation):
+        with self._lock:
+            job = self._jobs[job_id]
+        try:
+            if generation is not None:
+                generation.result()
+            output_path = Path(job["output_path"])
+            self._check_output(output_path)  # may have changed since submit
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            cached = self.cache_dir / job["input_hash"]
+            shutil.copyfile(cached.with_suffix(".json"), output_path.with_suffix(".json"))
+            shutil.copyfile(cached.with_suffix(".ahk"), output_path)
+            save_meta(output_path, {
+                "source_type": friendly_file_type(job["input_path"]),
+                "source_path": job["input_path"],
+                "version": VERSION,
+            })
+            if output_path.parent == AHK_DIR.resolve():
+                try:
+                    profile_index.index_profile(output_path)
+                except Exception:
+                    pass  # index is rebuilt by sync() on next launch
+            status, error = "done", None
+        except Exception as e:
+            status, error = "failed", str(e) or type(e).__name__
+
+        with self._lock:
+            job["status"] = status
+            job["error"] = error
+            job["finished_at"] = time.time()
+            job.pop("_generation", None)
+            self._inflight_jobs.pop((job["input_hash"], job["output_path"]), None)
+            if status == "done":
+                self.counters["completed"] += 1
+                self._total_duration += job["finished_at"] - job["submitted_at"]
+            else:
+                self.counters["failed"] += 1
+
+            self._finished.append(job_id)
+            while len(self._finished) > MAX_FINISHED_JOBS:
+                self._jobs.pop(self._finished.popleft(), None)
+
+    def _status(self, job: dict) -> str:
+        generation = job.get("_generation")
+        if job["status"] == "queued" and generation is not None and generation.running():
+            return "running"
+        return job["status"]
+
+    def _job_view(self, job_id: str) -> dict:
+        job = self._jobs[job_id]
+        view = {k: v for k, v in job.items() if not k.startswith("_")}
+        view["status"] = self._status(job)
+        return view
+
+
+# ===============================
+# HTTP front end
+# ===============================
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /jobs {"input_path", "output_path"}  → job
+    GET  /jobs                                → [job]
+    GET  /jobs/<id>                           → job
+    GET  /metrics                             → counters + throughput
+
+    Only requests addressed to this loopback port are served (guards against
+    DNS rebinding), and POST bodies must be application/json, which browsers
+    can't send cross-origin without a CORS preflight this server never grants.
+    """
+    server_version = "EmailHotkeyService"
+
+    @property
+    def service(self) -> GenerationService:
+        return self.server.service
+
+    def _send_json(self, status: HTTPStatus, payload):
+        body = json.dumps(payload, indent=2).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _foreign_host(self) -> bool:
+        port = self.server.server_port
+        allowed = {f"{HOST}:{port}", f"localhost:{port}"}
+        if self.headers.get("Host", "").lower() in allowed:
+            return False
+        self._send_json(HTTPStatus.FORBIDDEN, {"error": "Unexpected Host header."})
+        return True
+
+    def do_GET(self):
+        if self._foreign_host():
+            return
+        if self.path == "/metrics":
+            self._send_json(HTTPStatus.OK, self.service.metrics())
+        elif self.path == "/jobs":
+            self._send_json(HTTPStatus.OK, self.service.jobs())
+        elif self.path.startswith("/jobs/"):
+            job = self.service.job(self.path[len("/jobs/"):])
+            if job is None:
+                self._send_json(HTTPStatus.NOT_FOUND, {"error": "Unknown job."})
+            else:
+                self._send_json(HTTPStatus.OK, job)
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found."})
+
+    def do_POST(self):
+        if self._foreign_host():
+            return
+        if self.path != "/jobs":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found."})
+            return
+        if self.headers.get_content_type() != "application/json":
+            self._send_json(
+                HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+                {"error": "Content-Type must be application/json."},
+            )
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("Request body must be a JSON object.")
+            for field in ("input_path", "output_path"):
+                if field not in request:
+                    raise ValueError(f"Missing field: {field}")
+                if not isinstance(request[field], str) or not request[field]:
+                    raise ValueError(f"{field} must be a non-empty string.")
+            job = self.service.submit(request["input_path"], request["output_path"])
+        except BrokenProcessPool:
+            self._send_json(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                {"error": "A worker process died; the pool was restarted. Retry the request."},
+            )
+            return
+        except (ValueError, TypeError, OSError) as e:
+            # OSError covers unreadable inputs (FileNotFoundError, permissions…)
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e) or type(e).__name__})
+            return
+        self._send_json(HTTPStatus.ACCEPTED, job)
+
+
+def serve(port=DEFAULT_PORT, max_workers=DEFAULT_WORKERS, cache_dir=CACHE_DIR,
+          output_dirs=()):
+    service = GenerationService(
+        max_workers=max_workers, cache_dir=cache_dir, output_dirs=output_dirs
+    )
+    server = ThreadingHTTPServer((HOST, port), ServiceRequestHandler)
+    server.service = service
+    print(f"Email Hotkey service listening on http://{HOST}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+# ===============================
+# CLI support
+# ===============================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Local hotkey generation service (localhost only)."
+    )
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--cache-dir", type=Path, default=CACHE_DIR)
+    parser.add_argument(
+        "--allow-output-dir", type=Path, action="append", default=[],
+        help=f"Also allow writing profiles here (default: only {AHK_DIR}).",
+    )
+    args = parser.parse_args(argv)
+
+    serve(
+        port=args.port,
+        max_workers=args.workers,
+        cache_dir=args.cache_dir,
+        output_dirs=args.allow_output_dir,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,44 @@
+import json
+from pathlib import Path
+
+
+# ===============================
+# App storage
+# ===============================
+
+APP_DIR = Path.home() / ".email_hotkey_generator"
+AHK_DIR = APP_DIR / "ahk"
+
+
+# ===============================
+# Profile metadata (non-breaking)
+# ===============================
+
+def friendly_file_type(path: str) -> str:
+    ext = Path(path).suffix.lower()
+    if ext == ".csv":
+        return "CSV"
+    if ext == ".txt":
+        return "TXT"
+    if ext == ".eml":
+        return "EML"
+    return "—"
+
+
+def meta_path_for(ahk_path: Path) -> Path:
+    return ahk_path.with_suffix(".meta.json")
+
+
+def load_meta(ahk_path: Path) -> dict:
+    p = meta_path_for(ahk_path)
+    if p.exists():
+        try:
+            return json.loads(p.read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+    return {}
+
+
+def save_meta(ahk_path: Path, meta: dict):
+    p = meta_path_for(ahk_path)
+    p.write_text(json.dumps(meta, indent=2), encoding="utf-8")